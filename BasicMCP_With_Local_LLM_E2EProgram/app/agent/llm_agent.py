@@ -1,25 +1,105 @@
-import asyncio, json, logging, re
+import asyncio, hashlib, json, logging, math, re
+from functools import lru_cache
 from logging.config import dictConfig
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-import yaml
 import ollama
+from cachetools import TTLCache
 
 from mcp import ClientSession
 from app.agent.prompts import SYSTEM_PROMPT
+from app.config import LOGGING_PATH, get_cfg, load_yaml
 from app.agent.tool_catalog import compact_tool_summaries, render_catalog_text
-from app.mcp.mcp_client_utils import start_session, call_tool
+from app.jsonutil import json_dumps
+from app.mcp.mcp_client_utils import open_session, call_tool
 
 log = logging.getLogger("agent")
 
+# ------------------------------ LLM client ------------------------------------
+
+_client: Optional[ollama.AsyncClient] = None
+
+def _get_client(cfg: Dict[str, Any]) -> ollama.AsyncClient:
+    """
+    Return the process-wide async Ollama client.
+    One client means one pooled HTTP connection to the Ollama server instead of
+    a fresh connection per chat call, and awaiting it never blocks the event loop.
+    """
+    global _client
+    if _client is None:
+        llm_cfg = cfg["llm"]
+        _client = ollama.AsyncClient(host=llm_cfg.get("host"), timeout=llm_cfg.get("timeout_s", 30))
+    return _client
+
+async def _chat(cfg: Dict[str, Any], messages: List[Dict[str, str]], schema: Dict[str, Any]) -> str:
+    """
+    Send one chat request constrained to `schema` and return the stripped reply text.
+    keep_alive keeps the model resident between calls so the KV cache of the
+    shared system prefix can be reused by the next request.
+    """
+    llm_cfg = cfg["llm"]
+    resp = await _get_client(cfg).chat(
+        model=llm_cfg["model"],
+        messages=messages,
+        format=schema,
+        options={"temperature": llm_cfg.get("temperature", 0)},
+        keep_alive=llm_cfg.get("keep_alive", "60m"),
+    )
+    return resp["message"]["content"].strip()
+
+@lru_cache(maxsize=32)
+def _system_message(catalog: str) -> str:
+    # Every call site sends this exact string as its system message, so the
+    # prompt prefix stays byte-identical and Ollama can reuse its KV cache.
+    return SYSTEM_PROMPT + catalog + (
+        "\n\nOnly use tool names that appear in the Tools list above. "
+        "Never invent new tool names."
+    )
+
+@lru_cache(maxsize=32)
+def _decision_schema(tool_names: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    JSON schema for one agent decision, passed as Ollama's `format` so the
+    model can only emit {"final": str} or {"tool": <known name>, "args": {...}}.
+    """
+    return {
+        "oneOf": [
+            {
+                "type": "object",
+                "properties": {"final": {"type": "string"}},
+                "required": ["final"],
+                "additionalProperties": False,
+            },
+            {
+                "type": "object",
+                "properties": {
+                    "tool": {"type": "string", "enum": list(tool_names)},
+                    "args": {"type": "object"},
+                },
+                "required": ["tool", "args"],
+                "additionalProperties": False,
+            },
+        ]
+    }
+
 # --------------------- Parsing & normalization helpers ------------------------
 
-FENCE_RE = re.compile(r"^```(?:json)?|```$", re.IGNORECASE | re.MULTILINE)
+# Fences only at line boundaries, so backticks inside JSON string values survive
+FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE | re.MULTILINE)
 _NUM_RE = re.compile(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?')
+_JSON_DECODER = json.JSONDecoder()
+_ADD_RE = re.compile(r"\b(add|sum|plus)\b", re.IGNORECASE)
+_GREET_RE = re.compile(r"say[_ ]hello", re.IGNORECASE)
+_TOKEN_LEAD = "([{\"'"
+_TOKEN_TRAIL = ",.;:!?)]}\"'"
 
 def _strip_fences_and_prose(s: str) -> str:
     s = s.strip()
-    s = FENCE_RE.sub("", s).strip()
+    # Fast path: JSON-mode replies are almost always a bare object already
+    if s.startswith("{") and s.endswith("}"):
+        return s
+    if "`" in s:
+        s = FENCE_RE.sub("", s).strip()
     first = s.find("{")
     if first > 0:
         s = s[first:]
@@ -42,29 +122,47 @@ def _extract_first_json_object(text: str) -> str:
     raise ValueError("No complete JSON object found")
 
 def parse_llm_json(s: str) -> Dict[str, Any]:
-    obj = _extract_first_json_object(s)
-    return json.loads(obj)
-
-def _coerce_numbers(d: Dict[str, Any]) -> Dict[str, Any]:
-    if "args" in d and isinstance(d["args"], dict):
-        for k, v in list(d["args"].items()):
-            if isinstance(v, str):
-                try:
-                    if any(c in v for c in ".eE"):
-                        d["args"][k] = float(v)
-                    else:
-                        d["args"][k] = int(v)
-                except Exception:
-                    pass
-    return d
-
-def _normalize_decision(x: Dict[str, Any]) -> Dict[str, Any]:
+    s = _strip_fences_and_prose(s)
+    idx = s.find("{")
+    if idx != -1:
+        try:
+            # C-level decoder; stops at the end of the first complete value
+            obj, _end = _JSON_DECODER.raw_decode(s, idx)
+            return obj
+        except json.JSONDecodeError:
+            pass
+    return json.loads(_extract_first_json_object(s))
+
+def _coerce_number(v: Any) -> Any:
+    if isinstance(v, str):
+        # int() rejects "1.5"/"1e3" in C, so try it first and fall back to float()
+        try:
+            return int(v)
+        except ValueError:
+            try:
+                f = float(v)
+            except ValueError:
+                pass
+            else:
+                if math.isfinite(f):  # "nan"/"inf" stay strings
+                    return f
+    return v
+
+def _normalize_decision(x: Any) -> Dict[str, Any]:
+    """
+    Validate and normalize one parsed decision in a single walk (numeric
+    strings in args are coerced on the way). Raises ValueError describing
+    the shape problem, for logging.
+    """
     if not isinstance(x, dict):
-        raise ValueError("Top-level JSON must be an object")
+        raise ValueError("Top-level must be an object, not an array." if isinstance(x, list)
+                         else "Top-level JSON must be an object.")
 
     if "final" in x:
-        if len(x.keys()) != 1 or not isinstance(x["final"], str):
-            raise ValueError("Invalid final shape")
+        if "tool" in x:
+            raise ValueError("Do not include both 'final' and 'tool'.")
+        if len(x) != 1 or not isinstance(x["final"], str):
+            raise ValueError('Invalid final shape; return exactly {"final":"<answer>"}.')
         return {"final": x["final"]}
 
     if "tool" in x:
@@ -77,54 +175,69 @@ def _normalize_decision(x: Dict[str, Any]) -> Dict[str, Any]:
                     merged.update(item)
             args = merged
         if not isinstance(tool, str) or not isinstance(args, dict):
-            raise ValueError("Invalid tool shape")
-        x = {"tool": tool, "args": args}
-        x = _coerce_numbers(x)
-        return x
+            raise ValueError("Invalid tool shape; 'tool' must be a string and 'args' an object.")
+        return {"tool": tool, "args": {k: _coerce_number(v) for k, v in args.items()}}
 
-    raise ValueError("Missing 'final' or 'tool'")
+    raise ValueError("Missing 'final' or 'tool'.")
 
-def _violations(decision_text: str) -> str:
-    try:
-        obj = parse_llm_json(decision_text)
-    except Exception as e:
-        return f"Your output was not a single JSON object. Error: {e}"
-    notes = []
-    if isinstance(obj, list):
-        notes.append("Top-level must be an object, not an array.")
-    if "final" in obj and "tool" in obj:
-        notes.append("Do not include both 'final' and 'tool'.")
-    if "tool" in obj and isinstance(obj.get("args"), list):
-        notes.append("'args' must be an object, not an array.")
-    return " ".join(notes) or "Output shape violated the rules."
+def _parse_decision(raw: str) -> Dict[str, Any]:
+    """Parse and validate one LLM reply; raises ValueError if it is unusable."""
+    return _normalize_decision(parse_llm_json(raw))
 
-def _extract_two_numbers(text: str):
-    nums = _NUM_RE.findall(text or "")
-    if len(nums) >= 2:
+def _split_numbers(text: str, limit: Optional[int] = None) -> Optional[List[float]]:
+    """
+    Numbers from whitespace tokens like "12.5" or "7.25,", in order (at most
+    `limit`). Returns None as soon as a token holding a digit does not parse
+    whole ("$5", "x=3", "1,000"), since the result could then disagree with
+    the regex scan.
+    """
+    found = []
+    for tok in text.split():
+        tok = tok.lstrip(_TOKEN_LEAD).rstrip(_TOKEN_TRAIL)
+        if not any(map(str.isdigit, tok)):  # words, including "nan"/"inf"
+            continue
         try:
-            return float(nums[0]), float(nums[1])
-        except Exception:
-            return None, None
-    return None, None
+            found.append(float(tok))
+        except ValueError:
+            return None
+        if len(found) == limit:
+            break
+    return found
+
+def _extract_two_numbers(text: str):
+    text = text or ""
+    # Cheap pass first; only trusted when every numeric token before the second parsed cleanly
+    found = _split_numbers(text, limit=2)
+    if found is not None and len(found) == 2:
+        return found[0], found[1]
+
+    # Fall back to the regex, stopping after the first two matches
+    it = _NUM_RE.finditer(text)
+    m1 = next(it, None)
+    m2 = next(it, None)
+    if m1 is None or m2 is None:
+        return None, None
+    try:
+        return float(m1.group()), float(m2.group())
+    except ValueError:
+        return None, None
+
+A_KEYS = ("a", "x", "left", "lhs", "num1", "number1", "first", "value1")
+B_KEYS = ("b", "y", "right", "rhs", "num2", "number2", "second", "value2")
 
 def _canonicalize_args(tool: str, args: Dict[str, Any], user_input: str = "") -> Dict[str, Any]:
     if not isinstance(args, dict):
         args = {}
 
-    lower = {str(k).lower(): v for k, v in args.items()}
-
     if tool == "add_numbers":
-        a_keys = ["a", "x", "left", "lhs", "num1", "number1", "first", "value1"]
-        b_keys = ["b", "y", "right", "rhs", "num2", "number2", "second", "value2"]
+        if all(isinstance(k, str) and k.islower() for k in args):
+            lower = args
+        else:
+            lower = {str(k).lower(): v for k, v in args.items()}
 
-        def pick(keys):
-            for k in keys:
-                if k in lower:
-                    return lower[k]
-            return None
-
-        a_val = pick(a_keys)
-        b_val = pick(b_keys)
+        # Alias tuples are in priority order; the first key present wins
+        a_val = next((lower[k] for k in A_KEYS if k in lower), None)
+        b_val = next((lower[k] for k in B_KEYS if k in lower), None)
 
         # Backfill missing from the user's prompt
         if a_val is None or b_val is None:
@@ -146,206 +259,210 @@ def _canonicalize_args(tool: str, args: Dict[str, Any], user_input: str = "") ->
 
     return args
 
-async def _repair_to_known_tool(
+# ------------------------------ Response cache --------------------------------
+
+NO_ANSWER = "I couldn't complete the requested steps."
+
+_response_cache: Optional[TTLCache] = None
+cache_stats = {"hits": 0, "misses": 0}
+
+def _get_response_cache(cfg: Dict[str, Any]) -> Optional[TTLCache]:
+    """Process-wide answer cache; None when agent.cache_size is 0."""
+    global _response_cache
+    if _response_cache is None:
+        agent_cfg = cfg.get("agent", {})
+        size = agent_cfg.get("cache_size", 1024)
+        if size <= 0:
+            return None
+        _response_cache = TTLCache(maxsize=size, ttl=agent_cfg.get("cache_ttl_s", 600))
+    return _response_cache
+
+def _cache_key(model: str, catalog: str, user_input: str) -> bytes:
+    return hashlib.blake2b(f"{model}|{catalog}|{user_input}".encode(), digest_size=16).digest()
+
+# ------------------------------ Main agent -----------------------------------
+
+def _compose_final(sum_value: Optional[float], greet_msg: Optional[str], final: Optional[str] = None) -> str:
+    """
+    Single place that turns gathered tool results into the answer text.
+    Tool results win over the model's own `final`; NO_ANSWER if nothing was gathered.
+    """
+    if sum_value is not None and greet_msg:
+        return f"The sum is {sum_value}. {greet_msg}"
+    if sum_value is not None:
+        return f"The sum is {sum_value}"
+    if final is not None:
+        return final
+    if greet_msg:
+        return greet_msg
+    return NO_ANSWER
+
+async def agent_run(user_input: str, cfg: Dict[str, Any], session: Optional[ClientSession] = None) -> str:
+    """
+    Answer one user prompt.
+    Pass a long-lived, initialized `session` (see PersistentSession) to reuse the
+    MCP server across calls; without one a session is opened for this call only.
+    """
+    if session is not None:
+        return await _agent_loop(session, user_input, cfg)
+    async with open_session(cfg) as session:
+        return await _agent_loop(session, user_input, cfg)
+
+async def _agent_loop(session: ClientSession, user_input: str, cfg: Dict[str, Any]) -> str:
+    tools = await session.list_tools()
+    summaries = compact_tool_summaries(tools)
+    catalog = render_catalog_text(summaries)
+    allowed_tool_names = [t["name"] for t in summaries]
+
+    # Replies are only reproducible (hence cacheable) at temperature 0
+    cache = _get_response_cache(cfg) if cfg["llm"].get("temperature", 0) == 0 else None
+    if cache is None:
+        return await _solve(session, user_input, cfg, catalog, allowed_tool_names)
+
+    key = _cache_key(cfg["llm"]["model"], catalog, user_input)
+    answer = cache.get(key)
+    if answer is not None:
+        cache_stats["hits"] += 1
+        return answer
+    cache_stats["misses"] += 1
+    answer = await _solve(session, user_input, cfg, catalog, allowed_tool_names)
+    if answer != NO_ANSWER:
+        cache[key] = answer
+    return answer
+
+async def _solve(
+    session: ClientSession,
     user_input: str,
-    model: str,
-    timeout_ms: int,
-    allowed_tools: List[str],
-    decision_text: str,
-) -> Dict[str, Any]:
-    hint = (
-        "Choose a tool ONLY from this exact list: "
-        + ", ".join(f'"{n}"' for n in allowed_tools)
-        + ". Return exactly one minified JSON object."
-    )
+    cfg: Dict[str, Any],
+    catalog: str,
+    allowed_tool_names: List[str],
+) -> str:
+    allowed_tool_names_set = frozenset(allowed_tool_names)
+
+    must_greet = bool(_GREET_RE.search(user_input))
+
+    # Deterministic fast path: "add X and Y[, then say hello]" needs no LLM call.
+    # Only taken when the prompt holds exactly two numeric tokens that parse whole;
+    # anything else ("1,000", "1, 2 and 3", "$5") goes to the LLM.
+    if (
+        cfg.get("agent", {}).get("fast_path", True)
+        and "add_numbers" in allowed_tool_names_set
+        and (not must_greet or "say_hello" in allowed_tool_names_set)
+        and _ADD_RE.search(user_input)
+    ):
+        nums = _split_numbers(user_input)
+        if nums is not None and len(nums) == 2:
+            a, b = nums
+            observation = await call_tool(session, "add_numbers", {"a": a, "b": b})
+            try:
+                sum_value = float(observation)
+            except ValueError:
+                sum_value = None  # unexpected tool output — let the LLM loop handle it
+            if sum_value is not None:
+                greet_msg = str(await call_tool(session, "say_hello", {})) if must_greet else None
+                return _compose_final(sum_value, greet_msg)
+
+    sys_msg = _system_message(catalog)
     msgs = [
-        {"role": "system", "content": "Return ONLY one JSON object."},
+        {"role": "system", "content": sys_msg},
         {"role": "user", "content": user_input},
-        {"role": "assistant", "content": decision_text},
-        {"role": "user", "content": hint},
     ]
-    fixed = ollama.chat(
-        model=model,
-        messages=msgs,
-        options={"timeout": timeout_ms, "format": "json"},
-    )
-    raw = fixed["message"]["content"].strip()
-    return _normalize_decision(parse_llm_json(raw))
-
-# ------------------------------ Main agent -----------------------------------
 
-async def agent_run(user_input: str, cfg: Dict[str, Any]) -> str:
-    async with (await start_session(cfg)) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-
-            tools = await session.list_tools()
-            summaries = compact_tool_summaries(tools)
-            catalog = render_catalog_text(summaries)
-            allowed_tool_names = [t["name"] for t in summaries]
-
-            model = cfg["llm"]["model"]
-            timeout = cfg["llm"].get("timeout_s", 30)
-            timeout_ms = timeout * 1000
-
-            sys_msg = SYSTEM_PROMPT + catalog + (
-                "\n\nOnly use tool names that appear in the Tools list above. "
-                "Never invent new tool names."
-            )
-            msgs = [
+    # The schema constrains decoding, so the reply is normally valid on the first try
+    schema = _decision_schema(tuple(allowed_tool_names))
+    raw = await _chat(cfg, msgs, schema)
+    try:
+        decision_obj = _parse_decision(raw)
+    except ValueError as e:
+        # Truncated generation or a server that ignores the schema
+        log.warning("Unusable first LLM reply: %s", e)
+        return _compose_final(None, None)
+
+    max_steps = 5
+    steps = 0
+    observation: Optional[str] = None
+    # Follow-up turns are appended after the same system + user prefix
+    context_msgs = msgs
+
+    # Track final outputs we care about
+    sum_value: Optional[float] = None
+    greet_msg: Optional[str] = None
+
+    while steps < max_steps:
+        # If the model tries to finalize but a greeting is required and not done, force say_hello.
+        if "final" in decision_obj:
+            if must_greet and greet_msg is None:
+                decision_obj = {"tool": "say_hello", "args": {}}
+            else:
+                return _compose_final(sum_value, greet_msg, decision_obj["final"])
+
+        # The schema's enum already restricts tool names; guard against older Ollama servers
+        if decision_obj.get("tool") not in allowed_tool_names_set:
+            break  # compose from what we have
+
+        # Execute tool (with arg canonicalization)
+        tool_name = decision_obj["tool"]
+        tool_args = decision_obj.get("args", {})
+        tool_args = _canonicalize_args(tool_name, tool_args, user_input)
+
+        # Ensure add_numbers has both args; try a one-shot repair if needed
+        if tool_name == "add_numbers" and ("a" not in tool_args or "b" not in tool_args):
+            fix_msgs = [
                 {"role": "system", "content": sys_msg},
-                {"role": "user", "content": user_input},
+                {"role": "user", "content": f"From this instruction, extract the two numbers as 'a' and 'b' and return ONLY one minified JSON object like {{\"tool\":\"add_numbers\",\"args\":{{\"a\":<float>,\"b\":<float>}}}}: {user_input}"},
             ]
-
+            fixed_raw = await _chat(cfg, fix_msgs, schema)
             try:
-                first = ollama.chat(
-                    model=model,
-                    messages=msgs,
-                    options={"timeout": timeout_ms, "format": "json"},
-                )
-                raw1 = first["message"]["content"].strip()
-                decision_obj = _normalize_decision(parse_llm_json(raw1))
-            except Exception as e:
-                critique = _violations(raw1 if "raw1" in locals() else str(e))
-                repair_msgs = msgs + [
-                    {"role": "assistant", "content": raw1 if "raw1" in locals() else ""},
-                    {"role": "user", "content": f"Your previous reply violated the format: {critique}\nReturn ONE corrected object now."},
-                ]
-                second = ollama.chat(
-                    model=model,
-                    messages=repair_msgs,
-                    options={"timeout": timeout_ms, "format": "json"},
-                )
-                raw2 = second["message"]["content"].strip()
-                decision_obj = _normalize_decision(parse_llm_json(raw2))
-
-            max_steps = 5
-            steps = 0
-            observation: Optional[str] = None
-            context_msgs = [
-                {"role": "system", "content": "Return ONLY one minified JSON object each turn."},
-                {"role": "user", "content": user_input},
-            ]
-
-            # Track final outputs we care about
-            sum_value: Optional[float] = None
-            greet_msg: Optional[str] = None
-
-            must_greet = "say hello" in user_input.lower() or "say_hello" in user_input.lower()
-
-            while steps < max_steps:
-                # If the model tries to finalize but a greeting is required and not done, force say_hello.
-                if "final" in decision_obj:
-                    if must_greet and greet_msg is None:
-                        decision_obj = {"tool": "say_hello", "args": {}}
-                    else:
-                        # Compose a final if we already gathered pieces
-                        if sum_value is not None and greet_msg:
-                            return f"The sum is {sum_value}. {greet_msg}"
-                        if sum_value is not None:
-                            return f"The sum is {sum_value}"
-                        return decision_obj["final"]
-
-                # Validate/repair tool name
-                if decision_obj.get("tool") not in allowed_tool_names:
-                    try:
-                        decision_obj = await _repair_to_known_tool(
-                            user_input=user_input,
-                            model=model,
-                            timeout_ms=timeout_ms,
-                            allowed_tools=allowed_tool_names,
-                            decision_text=json.dumps(decision_obj, ensure_ascii=False),
-                        )
-                    except Exception:
-                        break  # fall through to compose from what we have
-                    if "final" in decision_obj:
-                        if must_greet and greet_msg is None:
-                            decision_obj = {"tool": "say_hello", "args": {}}
-                        else:
-                            if sum_value is not None and greet_msg:
-                                return f"The sum is {sum_value}. {greet_msg}"
-                            if sum_value is not None:
-                                return f"The sum is {sum_value}"
-                            return decision_obj["final"]
-
-                # Execute tool (with arg canonicalization)
-                tool_name = decision_obj["tool"]
-                tool_args = decision_obj.get("args", {})
-                tool_args = _canonicalize_args(tool_name, tool_args, user_input)
-
-                # Ensure add_numbers has both args; try a one-shot repair if needed
-                if tool_name == "add_numbers" and ("a" not in tool_args or "b" not in tool_args):
-                    fix_msgs = [
-                        {"role": "system", "content": "Return ONLY one minified JSON object like {\"tool\":\"add_numbers\",\"args\":{\"a\":<float>,\"b\":<float>}}"},
-                        {"role": "user", "content": f"From this instruction, extract the two numbers as 'a' and 'b' and return the tool call only: {user_input}"},
-                    ]
-                    fixed = ollama.chat(model=model, messages=fix_msgs, options={"timeout": timeout_ms, "format": "json"})
-                    fixed_raw = fixed["message"]["content"].strip()
-                    try:
-                        fixed_obj = _normalize_decision(parse_llm_json(fixed_raw))
-                        if fixed_obj.get("tool") == "add_numbers" and isinstance(fixed_obj.get("args"), dict):
-                            tool_args = _canonicalize_args("add_numbers", fixed_obj["args"], user_input)
-                    except Exception:
-                        pass
-                if tool_name == "add_numbers" and ("a" not in tool_args or "b" not in tool_args):
-                    # Can't recover — stop and compose
-                    break
-
-                # Call the tool
-                observation = await call_tool(session, tool_name, tool_args)
-
-                # Capture results deterministically
-                if tool_name == "add_numbers":
-                    try:
-                        sum_value = float(observation)
-                    except Exception:
-                        # sometimes API returns {"result": ...}; guard via str parsing
-                        try:
-                            sum_value = float(str(observation))
-                        except Exception:
-                            pass
-                elif tool_name == "say_hello":
-                    greet_msg = str(observation)
-
-                # If greeting is required and not done yet, schedule it deterministically
-                if must_greet and greet_msg is None:
-                    decision_obj = {"tool": "say_hello", "args": {}}
-                    steps += 1
-                    continue
-
-                # Otherwise ask the model what to do next (another tool or final)
-                turn = [
-                    {"role": "assistant", "content": json.dumps(decision_obj, ensure_ascii=False)},
-                    {"role": "user", "content": f"Observation: {observation}\nReturn either the next tool JSON or the final JSON. Use only these tools: " + ", ".join(allowed_tool_names)},
-                ]
-                nxt = ollama.chat(
-                    model=model,
-                    messages=context_msgs + turn,
-                    options={"timeout": timeout_ms, "format": "json"},
-                )
-                rawn = nxt["message"]["content"].strip()
+                fixed_obj = _parse_decision(fixed_raw)
+                if fixed_obj.get("tool") == "add_numbers" and isinstance(fixed_obj.get("args"), dict):
+                    tool_args = _canonicalize_args("add_numbers", fixed_obj["args"], user_input)
+            except Exception:
+                pass
+        if tool_name == "add_numbers" and ("a" not in tool_args or "b" not in tool_args):
+            # Can't recover — stop and compose
+            break
+
+        # Call the tool
+        observation = await call_tool(session, tool_name, tool_args)
+
+        # Capture results deterministically
+        if tool_name == "add_numbers":
+            try:
+                sum_value = float(observation)
+            except Exception:
+                # sometimes API returns {"result": ...}; guard via str parsing
                 try:
-                    decision_obj = _normalize_decision(parse_llm_json(rawn))
+                    sum_value = float(str(observation))
                 except Exception:
-                    break  # parse failed — compose from what we have
+                    pass
+        elif tool_name == "say_hello":
+            greet_msg = str(observation)
+
+        # If greeting is required and not done yet, schedule it deterministically
+        if must_greet and greet_msg is None:
+            decision_obj = {"tool": "say_hello", "args": {}}
+            steps += 1
+            continue
+
+        # Otherwise ask the model what to do next (another tool or final)
+        turn = [
+            {"role": "assistant", "content": json_dumps(decision_obj)},
+            {"role": "user", "content": f"Observation: {observation}\nReturn either the next tool JSON or the final JSON. Use only these tools: " + ", ".join(allowed_tool_names)},
+        ]
+        rawn = await _chat(cfg, context_msgs + turn, schema)
+        try:
+            decision_obj = _parse_decision(rawn)
+        except Exception:
+            break  # parse failed — compose from what we have
 
-                steps += 1
+        steps += 1
 
-            # ---- Compose a sensible final no matter how we exit ----
-            if sum_value is not None and greet_msg:
-                return f"The sum is {sum_value}. {greet_msg}"
-            if sum_value is not None:
-                return f"The sum is {sum_value}"
-            if greet_msg:
-                return greet_msg
-            return "I couldn't complete the requested steps."
-            
+    # ---- Compose a sensible final no matter how we exit ----
+    return _compose_final(sum_value, greet_msg)
 
 def main():
-    with open("app/config/logging.yaml", "r") as f:
-        dictConfig(yaml.safe_load(f))
-    with open("app/config/settings.yaml", "r") as f:
-        cfg = yaml.safe_load(f)
+    dictConfig(load_yaml(LOGGING_PATH))
+    cfg = get_cfg()
 
     import argparse
     ap = argparse.ArgumentParser()
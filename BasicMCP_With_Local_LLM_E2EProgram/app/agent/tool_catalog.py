@@ -1,5 +1,6 @@
 
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 
 def compact_tool_summaries(tools) -> List[Dict[str, Any]]:
     summaries = []
@@ -16,7 +17,13 @@ def compact_tool_summaries(tools) -> List[Dict[str, Any]]:
     return summaries
 
 def render_catalog_text(summaries: List[Dict[str, Any]]) -> str:
+    key = tuple((t["name"], t["signature"], t["description"]) for t in summaries)
+    return _render_catalog_cached(key)
+
+@lru_cache(maxsize=32)
+def _render_catalog_cached(entries: Tuple[Tuple[str, str, str], ...]) -> str:
+    # Same tool list -> same string object, keeping the LLM prompt prefix stable
     lines = ["\nTools:\n"]
-    for t in summaries:
-        lines.append(f"- {t['name']}: {t['signature']} — {t['description']}")
+    for name, signature, description in entries:
+        lines.append(f"- {name}: {signature} — {description}")
     return "\n".join(lines)
@@ -0,0 +1,101 @@
+
+import os, sys
+from contextlib import asynccontextmanager
+
+if __package__ in (None, ""):
+    # Allow `python app/api/agent_api.py` from the project root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import anyio
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from pydantic import BaseModel, ConfigDict
+import uvicorn
+from mcp import types as mcp_types
+from mcp.shared.exceptions import McpError
+
+from app.agent.llm_agent import agent_run, cache_stats
+from app.config import get_cfg
+from app.mcp.mcp_client_utils import PersistentSession
+
+cfg = get_cfg()
+
+HOST = cfg["servers"].get("agent_host", "127.0.0.1")
+PORT = cfg["servers"].get("agent_port", 8100)
+
+# Errors that mean the MCP subprocess / its pipes are gone
+SESSION_ERRORS = (ConnectionError, anyio.BrokenResourceError, anyio.ClosedResourceError)
+# In-flight requests see McpError(CONNECTION_CLOSED) when the server's stdout closes
+CONNECTION_CLOSED = getattr(mcp_types, "CONNECTION_CLOSED", -32000)
+
+def _session_lost(e: Exception) -> bool:
+    if isinstance(e, SESSION_ERRORS):
+        return True
+    return isinstance(e, McpError) and getattr(e.error, "code", None) == CONNECTION_CLOSED
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawn the MCP server once and share it across requests
+    app.state.mcp = PersistentSession(cfg)
+    await app.state.mcp.start()
+    try:
+        yield
+    finally:
+        await app.state.mcp.close()
+
+app = FastAPI(title="MCP Agent API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+class AgentRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    question: str
+
+async def _live_session(mcp: PersistentSession, broken=None):
+    """Return a live shared session, restarting if needed; 503 if none can be had."""
+    try:
+        await mcp.restart(broken=broken)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"MCP server unavailable: {e}")
+    if mcp.session is None:
+        # Never fall back to agent_run(session=None): that spawns a server per request
+        raise HTTPException(status_code=503, detail="MCP server unavailable")
+    return mcp.session
+
+@app.post("/agent")
+async def ask_agent(req: AgentRequest):
+    mcp = app.state.mcp
+    session = mcp.session
+    if session is None:
+        session = await _live_session(mcp)
+    try:
+        answer = await agent_run(req.question, cfg, session=session)
+    except Exception as e:
+        if not _session_lost(e):
+            raise
+        # Watchdog: the MCP server died under us — respawn and retry once
+        session = await _live_session(mcp, broken=session)
+        try:
+            answer = await agent_run(req.question, cfg, session=session)
+        except Exception as e:
+            raise HTTPException(status_code=502, detail=str(e))
+    return {"answer": answer}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text exposition format
+    hits, misses = cache_stats["hits"], cache_stats["misses"]
+    lookups = hits + misses
+    return (
+        "# HELP agent_response_cache_hits_total Agent answers served from the response cache.\n"
+        "# TYPE agent_response_cache_hits_total counter\n"
+        f"agent_response_cache_hits_total {hits}\n"
+        "# HELP agent_response_cache_misses_total Cacheable agent requests that missed the cache.\n"
+        "# TYPE agent_response_cache_misses_total counter\n"
+        f"agent_response_cache_misses_total {misses}\n"
+        "# HELP agent_response_cache_hit_ratio Fraction of cacheable requests served from the cache.\n"
+        "# TYPE agent_response_cache_hit_ratio gauge\n"
+        f"agent_response_cache_hit_ratio {hits / lookups if lookups else 0.0}\n"
+    )
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=HOST, port=PORT)
@@ -1,23 +1,33 @@
 
+import os, sys
+
+if __package__ in (None, ""):
+    # Allow `python app/api/rest_api.py` from the project root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
 from fastapi import FastAPI
-from pydantic import BaseModel
-import uvicorn, yaml
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
+import uvicorn
 
-with open("app/config/settings.yaml", "r") as f:
-    cfg = yaml.safe_load(f)
+from app.config import HELLO_MESSAGE, get_cfg
+
+cfg = get_cfg()
 
 HOST = cfg["servers"]["rest_host"]
 PORT = cfg["servers"]["rest_port"]
 
-app = FastAPI(title="Basic REST API")
+app = FastAPI(title="Basic REST API", default_response_class=ORJSONResponse)
 
 class MathRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     a: float
     b: float
 
 @app.get("/hello")
 def hello():
-    return {"message": "Hello from REST API!"}
+    return {"message": HELLO_MESSAGE}
 
 @app.post("/add")
 def add_numbers(request: MathRequest):
@@ -0,0 +1,52 @@
+import json, logging, os
+from functools import lru_cache
+from typing import Any, Dict
+
+import yaml
+
+log = logging.getLogger(__name__)
+
+CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+SETTINGS_PATH = os.path.join(CONFIG_DIR, "settings.yaml")
+LOGGING_PATH = os.path.join(CONFIG_DIR, "logging.yaml")
+
+# libyaml's C loader when PyYAML was built with it; pure-Python otherwise
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def load_yaml(path: str) -> Any:
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=_YAML_LOADER)
+
+def _load_settings(path: str) -> Dict[str, Any]:
+    """
+    Load settings, preferring a JSON copy next to the YAML when it is newer.
+    The JSON copy is (re)written whenever the YAML changes; failing to write
+    it (e.g. read-only checkout) is harmless.
+    """
+    cache_path = os.path.splitext(path)[0] + ".cache.json"
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            with open(cache_path, "r") as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    cfg = load_yaml(path)
+    try:
+        with open(cache_path, "w") as f:
+            json.dump(cfg, f)
+    except (OSError, TypeError) as e:
+        log.debug("Could not write settings cache %s: %s", cache_path, e)
+    return cfg
+
+# Greeting shared by the REST API's /hello and the in-process say_hello tools
+HELLO_MESSAGE = "Hello from REST API!"
+
+def use_rest_backend(cfg: Dict[str, Any]) -> bool:
+    """True when MCP tools should call the REST API instead of computing in-process."""
+    return bool(cfg["servers"].get("use_rest_backend", False))
+
+@lru_cache(maxsize=None)
+def get_cfg(path: str = SETTINGS_PATH) -> Dict[str, Any]:
+    """Parsed settings.yaml, loaded once per process. Treat it as read-only."""
+    return _load_settings(path)
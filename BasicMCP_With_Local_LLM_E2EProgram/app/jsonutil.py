@@ -0,0 +1,11 @@
+import json
+from typing import Any
+
+import orjson
+
+def json_dumps(obj: Any) -> str:
+    """orjson when it can; stdlib json for what orjson rejects (e.g. ints beyond 64 bits)."""
+    try:
+        return orjson.dumps(obj).decode()
+    except TypeError:
+        return json.dumps(obj, ensure_ascii=False, default=str)
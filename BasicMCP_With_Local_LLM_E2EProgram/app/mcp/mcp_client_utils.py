@@ -1,9 +1,14 @@
-import sys, os, json, logging
-from typing import Any, Dict
+import asyncio, sys, os, logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
 
-from mcp import ClientSession, StdioServerParameters
+import aiohttp
+import orjson
+from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
 
+from app.jsonutil import json_dumps
+
 log = logging.getLogger(__name__)
 
 def _params_from_cfg(cfg: Dict[str, Any]) -> StdioServerParameters:
@@ -20,7 +25,8 @@ def _params_from_cfg(cfg: Dict[str, Any]) -> StdioServerParameters:
     # Force the venv's interpreter (the one running the agent)
     command = sys.executable
 
-    args = mcp_cfg.get("args", ["app/mcp/mcp_server.py"])
+    # Copy: cfg may be the process-wide cached settings dict
+    args = list(mcp_cfg.get("args", ["app/mcp/mcp_server.py"]))
     if args and not os.path.isabs(args[0]):
         args[0] = os.path.abspath(args[0])
 
@@ -40,9 +46,132 @@ async def start_session(cfg: Dict[str, Any]):
     params = _params_from_cfg(cfg)
     return stdio_client(params)
 
+class HttpToolSession:
+    """
+    ClientSession-like facade over mcp_server_http.py (/tools, /call_tool).
+    Implements the subset the agent uses: initialize, list_tools, call_tool.
+    """
+
+    def __init__(self, base_url: str, http: aiohttp.ClientSession):
+        self._base_url = base_url.rstrip("/")
+        self._http = http
+
+    async def initialize(self) -> None:
+        pass  # stateless HTTP; nothing to negotiate
+
+    async def list_tools(self) -> types.ListToolsResult:
+        async with self._http.get(f"{self._base_url}/tools") as resp:
+            resp.raise_for_status()
+            data = await resp.json(loads=orjson.loads)
+        return types.ListToolsResult(
+            tools=[
+                types.Tool(name=t["name"], description=t.get("description", ""), inputSchema={"type": "object"})
+                for t in data.get("tools", [])
+            ]
+        )
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> types.CallToolResult:
+        payload = {"name": name, "args": arguments or {}}
+        async with self._http.post(f"{self._base_url}/call_tool", json=payload) as resp:
+            data = await resp.json(loads=orjson.loads)
+            if resp.status != 200:
+                # Mirror MCP semantics: tool failures come back as error results
+                detail = data.get("detail", resp.reason) if isinstance(data, dict) else resp.reason
+                return types.CallToolResult(isError=True, content=[types.TextContent(type="text", text=str(detail))])
+        return types.CallToolResult(content=[types.TextContent(type="text", text=str(data.get("result", "")))])
+
+@asynccontextmanager
+async def open_session(cfg: Dict[str, Any]) -> AsyncIterator[Any]:
+    """
+    Yield an initialized MCP session for the configured transport.
+    - mcp.transport == "http": talk to mcp_server_http.py over a pooled
+      aiohttp session (no subprocess).
+    - otherwise (default "stdio"): spawn mcp_server.py via start_session.
+    Usage:
+        async with open_session(cfg) as session:
+            ...
+    """
+    if cfg.get("mcp", {}).get("transport", "stdio") == "http":
+        servers = cfg["servers"]
+        base_url = f"http://{servers['mcp_http_host']}:{servers['mcp_http_port']}"
+        log.info("Using HTTP MCP server at %s", base_url)
+        connector = aiohttp.TCPConnector(limit=100, keepalive_timeout=60, enable_cleanup_closed=True)
+        async with aiohttp.ClientSession(connector=connector, json_serialize=json_dumps) as http:
+            session = HttpToolSession(base_url, http)
+            await session.initialize()
+            yield session
+        return
+
+    async with (await start_session(cfg)) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+class PersistentSession:
+    """
+    One MCP session (stdio subprocess or HTTP pool) kept alive for the whole app.
+    The session contexts are owned by a background task so they are
+    entered and exited in the same task (anyio requires this), while any
+    other task may issue requests through `.session`.
+    Usage:
+        mcp = PersistentSession(cfg)
+        await mcp.start()
+        ... await agent_run(question, cfg, session=mcp.session) ...
+        await mcp.close()
+    """
+
+    def __init__(self, cfg: Dict[str, Any]):
+        self._cfg = cfg
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+        self.session: Optional[ClientSession] = None
+
+    async def _serve(self, ready: asyncio.Future) -> None:
+        async with open_session(self._cfg) as session:
+            self.session = session
+            ready.set_result(None)
+            try:
+                await self._stop.wait()
+            finally:
+                self.session = None
+
+    async def start(self) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._serve(ready))
+        await asyncio.wait({ready, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not ready.done():
+            self._task.result()  # re-raise the startup failure
+            raise RuntimeError("MCP session exited during startup")
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await self._task
+        except Exception as e:
+            log.warning("MCP session shut down with error: %s", e)
+        self._task = None
+
+    async def restart(self, broken: Optional[ClientSession] = None) -> None:
+        """
+        Reopen the MCP session. With `broken=None` this only ensures a session
+        exists. Either way it is a no-op when, checked under the lock, a live
+        session other than `broken` is already in place (another caller won).
+        """
+        async with self._lock:
+            if self.session is not None and self.session is not broken:
+                return
+            log.warning("Restarting MCP server session")
+            await self.close()
+            await self.start()
+
 async def call_tool(session: ClientSession, name: str, args: Dict[str, Any]) -> str:
     """Call a tool by name and return the first text-ish content."""
-    log.info("Calling tool %s with args=%s", name, json.dumps(args))
+    if log.isEnabledFor(logging.INFO):
+        log.info("Calling tool %s with args=%s", name, json_dumps(args))
     result = await session.call_tool(name, args)
     if not result or not result.content:
         return ""
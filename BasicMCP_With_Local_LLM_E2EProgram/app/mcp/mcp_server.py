@@ -1,5 +1,5 @@
 # Print interpreter for sanity (should be your .venv python)
-import sys
+import os, sys
 print("[mcp_server] sys.executable =", sys.executable, flush=True)
 
 # IMPORTANT: set Windows loop policy early (before imports that use asyncio)
@@ -7,36 +7,73 @@ import asyncio
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+if __package__ in (None, ""):
+    # Allow `python app/mcp/mcp_server.py` from the project root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
 import aiohttp
-import yaml
 from mcp.server.fastmcp import FastMCP  # <-- use FastMCP bundled with 'mcp' package
 
+from app.config import HELLO_MESSAGE, get_cfg, use_rest_backend
+
 # Load REST host/port from config
-with open("app/config/settings.yaml", "r") as f:
-    cfg = yaml.safe_load(f)
+cfg = get_cfg()
 
 REST_HOST = cfg["servers"]["rest_host"]
 REST_PORT = cfg["servers"]["rest_port"]
+USE_REST_BACKEND = use_rest_backend(cfg)
+
+# One pooled HTTP session for all tool calls (created lazily on the server's loop)
+_http: Optional[aiohttp.ClientSession] = None
+_http_lock = asyncio.Lock()
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    # Close the pooled session (if a tool created one) when the server stops
+    global _http
+    try:
+        yield
+    finally:
+        if _http is not None and not _http.closed:
+            await _http.close()
+        _http = None
+
+mcp = FastMCP("math-api-server", lifespan=lifespan)
 
-mcp = FastMCP("math-api-server")
+async def _get_http() -> aiohttp.ClientSession:
+    global _http
+    if _http is None or _http.closed:
+        async with _http_lock:
+            if _http is None or _http.closed:
+                connector = aiohttp.TCPConnector(limit=100, keepalive_timeout=60, enable_cleanup_closed=True)
+                _http = aiohttp.ClientSession(connector=connector)
+    return _http
 
 @mcp.tool()
 async def add_numbers(a: float, b: float) -> float:
-    """Add two numbers using the REST API."""
-    async with aiohttp.ClientSession() as session:
-        async with session.post(f"http://{REST_HOST}:{REST_PORT}/add", json={"a": a, "b": b}) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            return float(data.get("result", 0.0))
+    """Add two numbers."""
+    # Docstring is the tool description the LLM sees; the REST hop is config-only
+    if not USE_REST_BACKEND:
+        return float(a) + float(b)
+    http = await _get_http()
+    async with http.post(f"http://{REST_HOST}:{REST_PORT}/add", json={"a": a, "b": b}) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+        return float(data.get("result", 0.0))
 
 @mcp.tool()
 async def say_hello() -> str:
-    """Say hello using the REST API."""
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"http://{REST_HOST}:{REST_PORT}/hello") as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            return str(data.get("message", ""))
+    """Say hello."""
+    if not USE_REST_BACKEND:
+        return HELLO_MESSAGE
+    http = await _get_http()
+    async with http.get(f"http://{REST_HOST}:{REST_PORT}/hello") as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+        return str(data.get("message", ""))
 
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
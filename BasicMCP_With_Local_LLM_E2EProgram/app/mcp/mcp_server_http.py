@@ -1,21 +1,43 @@
 import asyncio, inspect
+from contextlib import asynccontextmanager
 import aiohttp
+import orjson
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import uvicorn, yaml
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
+import uvicorn
 
 # Windows selector loop (compat)
-import sys, asyncio as _asyncio
+import os, sys, asyncio as _asyncio
 if sys.platform.startswith("win"):
     _asyncio.set_event_loop_policy(_asyncio.WindowsSelectorEventLoopPolicy())
 
-with open("app/config/settings.yaml", "r") as f:
-    cfg = yaml.safe_load(f)
+if __package__ in (None, ""):
+    # Allow `python app/mcp/mcp_server_http.py` from the project root
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.config import HELLO_MESSAGE, get_cfg, use_rest_backend
+from app.jsonutil import json_dumps
+
+cfg = get_cfg()
 
 REST_HOST = cfg["servers"]["rest_host"]
 REST_PORT = cfg["servers"]["rest_port"]
 HTTP_HOST = cfg["servers"]["mcp_http_host"]
 HTTP_PORT = cfg["servers"]["mcp_http_port"]
+USE_REST_BACKEND = use_rest_backend(cfg)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP session to the REST API for the lifetime of the server
+    connector = aiohttp.TCPConnector(limit=100, keepalive_timeout=60, enable_cleanup_closed=True)
+    app.state.http = aiohttp.ClientSession(connector=connector, json_serialize=json_dumps)
+    try:
+        yield
+    finally:
+        await app.state.http.close()
+
+app = FastAPI(title="MCP HTTP wrapper (calls REST API)", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Minimal tool registry for HTTP exposure
 registered_tools = {}
@@ -26,29 +48,39 @@ def register_tool(func):
 
 @register_tool
 async def add_numbers(a: float, b: float) -> float:
-    async with aiohttp.ClientSession() as session:
-        async with session.post(f"http://{REST_HOST}:{REST_PORT}/add", json={"a": a, "b": b}) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            return float(data["result"])
+    """Add two numbers."""
+    if not USE_REST_BACKEND:
+        return float(a) + float(b)
+    async with app.state.http.post(f"http://{REST_HOST}:{REST_PORT}/add", json={"a": a, "b": b}) as resp:
+        resp.raise_for_status()
+        data = await resp.json(loads=orjson.loads)
+        return float(data["result"])
 
 @register_tool
 async def say_hello() -> str:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(f"http://{REST_HOST}:{REST_PORT}/hello") as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            return str(data.get("message", ""))
-
-app = FastAPI(title="MCP HTTP wrapper (calls REST API)")
+    """Say hello."""
+    if not USE_REST_BACKEND:
+        return HELLO_MESSAGE
+    async with app.state.http.get(f"http://{REST_HOST}:{REST_PORT}/hello") as resp:
+        resp.raise_for_status()
+        data = await resp.json(loads=orjson.loads)
+        return str(data.get("message", ""))
 
 class ToolCallRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
     name: str
     args: dict = {}
 
 @app.get("/tools")
 async def list_tools():
-    return {"tools": list(registered_tools.keys())}
+    # Docstrings double as tool descriptions, matching what FastMCP reports over stdio
+    return {
+        "tools": [
+            {"name": name, "description": inspect.getdoc(func) or ""}
+            for name, func in registered_tools.items()
+        ]
+    }
 
 @app.post("/call_tool")
 async def call_tool(req: ToolCallRequest):
@@ -61,7 +93,7 @@ async def call_tool(req: ToolCallRequest):
         else:
             loop = asyncio.get_event_loop()
             result = await loop.run_in_executor(None, lambda: func(**req.args))
-        return {"result": result}
+        return ORJSONResponse({"result": result})
     except aiohttp.ClientResponseError as cre:
         raise HTTPException(status_code=cre.status, detail=str(cre))
     except Exception as e: